@@ -0,0 +1,64 @@
+"""This file, written by Andrew H. Pometta, is the file responsible for
+level-of-detail downsampling of the exact formula tables from DeathrollCalc.py
+before they are plotted by DRPlot.py.  With a large maximum roll, plotting
+every point makes matplotlib crawl, while a graph can only show about one
+point per horizontal pixel anyway.
+"""
+
+import numpy as np
+
+"""Custom exception class for ValueError."""
+
+
+class DRDownsampleValueError(ValueError):
+    pass
+
+"""This function reduces a line to at most points points, always keeping the
+first and last point (so a line is never reduced below 4 points by "minmax",
+or 2 by "log").  x must be increasing, and the reduced x stays strictly
+increasing.  Returns the reduced x and y as a pair of numpy.ndarrays.
+
+x: the x values of the line, any sequence numpy can turn into an array.
+y: the y values of the line, the same length as x.
+points: the maximum number of points to keep.  If it is 0 or less, or the line
+        has no more than points points, x and y are returned unchanged.
+method: "log" keeps points whose positions are evenly spaced on a log scale,
+        which suits log scaled x axes.  "minmax" splits the line into
+        max((points - 2) // 2, 1) buckets of ceil(len(x) / buckets)
+        consecutive points (the last bucket may be shorter) and keeps the
+        lowest and highest point of each, so that no spike is lost.  Default
+        "minmax".
+
+If x and y differ in length, or method is neither "log" nor "minmax", a
+DRDownsampleValueError is raised.
+"""
+
+
+def downsample(x, y, points, method="minmax"):
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) != len(y):
+        raise DRDownsampleValueError("x has {} points but y has {}".format(
+            len(x), len(y)))
+    if method not in ("log", "minmax"):
+        raise DRDownsampleValueError(
+            "Argument {} for method is not \"log\" or \"minmax\"".format(
+                method))
+    if points <= 0 or len(x) <= points:
+        return x, y
+    if method == "log":
+        index = np.geomspace(1, len(x), points).astype(int) - 1
+    else:
+        # pad the last bucket with the final value so the buckets can be
+        # reshaped into rows, then pick the extremes of each row.  Padding
+        # that is picked is clipped back to the final point, of equal value
+        buckets = max((points - 2) // 2, 1)
+        size = -(-len(y) // buckets)
+        rows = np.pad(y, (0, size * buckets - len(y)), "edge").reshape(
+            buckets, size)
+        offsets = np.arange(buckets) * size
+        index = np.minimum(np.hstack((rows.argmin(axis=1) + offsets,
+                                      rows.argmax(axis=1) + offsets)),
+                           len(y) - 1)
+    index = np.unique(np.hstack((0, index, len(x) - 1)))
+    return x[index], y[index]
@@ -12,6 +12,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import DeathrollCalc as drc
 import DRSimulate as drs
+import DRDownsample as drd
+import DRStore
 
 """Settings for both graphs."""
 
@@ -25,9 +27,25 @@ calc_max = 1000
 mc_range = [2, 5, 10, 25, 50, 100, 500, 1000]
 # sample size for the Monte Carlo simuation
 mc_samples = 5_000
+# file to pool Monte Carlo results in across runs, so that only the shortfall
+# up to mc_samples is simulated, e.g. "mc_store.txt".  Set to None to disable
+mc_store_path = None
 # string to represent sample size for annotations - set to empty string to
-# disable top annotation
+# disable top annotation.  Replaced by the pooled sample size if a store is
+# used
 mc_string = "100M"
+# update the Monte Carlo markers in place while the samples are being
+# simulated, in mc_live_steps even steps up to mc_samples, instead of only
+# drawing the final results
+mc_live = False
+mc_live_steps = 10
+# maximum number of points the exact formula lines are reduced to before
+# plotting - by default one per horizontal pixel.  Set to 0 to plot every point
+lod_points = graph_size[0] * resolution
+# how to reduce the exact formula lines: "log" keeps log-spaced points,
+# "minmax" keeps the lowest and highest point of each bucket, and "auto" uses
+# "log" for log scaled x axes and "minmax" otherwise
+lod_method = "auto"
 # whether or not to even graph the winrate graph
 wr_graph = True
 # and likewise for the rolls
@@ -51,9 +69,12 @@ wr_alpha = 0.5
 # to match main data
 wr_first_alpha = wr_alpha / 8
 # the ticks for the x axis.  Don't touch if you don't know what you're
-# looking at
+# looking at.  These only fit the default calc_max: for any other, they are
+# left to matplotlib
 wr_xticks = np.hstack((np.arange(1, 10, 1), np.arange(10, 50, 5),
                        np.arange(50, 100, 50), np.arange(100, 1001, 100)))
+if calc_max != 1000:
+    wr_xticks = None
 # and the tick labels
 wr_xlabels = np.array([1, 2, 3, 4, 5, 10, 25, 50, 100, 500, 1000])
 
@@ -76,35 +97,65 @@ rolls_log = False
 # set to 0 for automatic calculation
 rolls_ymax = 10
 # ticks for the rolls graph
-rolls_xticks = np.arange(0, 1001, 100)
+rolls_xticks = np.arange(0, calc_max + 1, max(calc_max // 10, 1))
 
 """Function for streamlining the annotations."""
 
 
-def annotate(text, x, xarray, xyt):
-    plt.annotate(text, xy=(x, xarray[x - 1]), xytext=xyt,
+def annotate(text, x, func, xyt):
+    plt.annotate(text, xy=(x, func(x)), xytext=xyt,
                  arrowprops=dict(arrowstyle='-'), fontsize="small")
 
 
+"""Function for reducing an exact formula line with DRDownsample before
+plotting, so that large values of calc_max don't make matplotlib crawl.  logx
+is whether the graph uses a log x scale, for choosing the method when
+lod_method is "auto"."""
+
+
+def downsample(x, y, logx=False):
+    method = lod_method
+    if method == "auto":
+        method = "log" if logx else "minmax"
+    return drd.downsample(x, y, lod_points, method)
+
+
 """Initialize the data sets.  Use small mc_samples value for testing, then
 only increase when the graph's visual settings are to your liking."""
 
 calc_range = range(1, calc_max + 1)
-mc_data = drs.deathroll_mc(mc_range, mc_samples)
+mc_store = None if mc_store_path is None else DRStore.DRResultStore(
+    mc_store_path)
+if mc_live:
+    # live updates need somewhere to pool the steps, even if not saved
+    if mc_store is None:
+        mc_store = DRStore.DRResultStore()
+    mc_step = max(mc_samples // mc_live_steps, 1)
+    mc_data = drs.deathroll_mc(mc_range, mc_step, store=mc_store)
+else:
+    mc_data = drs.deathroll_mc(mc_range, mc_samples, store=mc_store)
+if mc_store is not None and mc_store.path is not None:
+    mc_store.save()
+if mc_store is not None and mc_string != "":
+    # label the pooled sample size rather than the hand-written one
+    mc_string = "{:,}".format(min(mc_store.games(i) for i in mc_range))
 p1_winrate_mc = mc_data[:, 0]
 p2_winrate_mc = 1 - p1_winrate_mc
 avg_rolls_mc = mc_data[:, 1]
 
+# Only the reduced lines from 2 onwards are kept here.  DeathrollCalc stores
+# the information calculated thus far, so the first segment and the
+# annotations look their values up there rather than in full-size copies.
 if wr_graph:
-    # DeathrollCalc stores the information calculated thus far, meaning we
-    # aren't reduplicating efforts in getting data twice
-    p1_winrate_calc = drc.p1_winrate(calc_range)
-    p2_winrate_calc = drc.p2_winrate(calc_range)
+    wr_calc_x, p1_winrate_calc = downsample(
+        calc_range[1:], drc.p1_winrate(calc_range[1:]), wr_logx)
+    p2_winrate_calc = 1 - p1_winrate_calc
 if rolls_graph:
-    avg_rolls_calc = drc.avg_rolls(calc_range)
-    if rolls_log:  # the range of ln, from 1 to 1000
-        log_range = np.fromfunction(np.vectorize(lambda n: math.log(n + 1)),
-                                    (calc_max,))
+    rolls_calc_x, avg_rolls_calc = downsample(
+        calc_range[1:], drc.avg_rolls(calc_range[1:]), rolls_logx)
+    if rolls_log:  # the range of ln, from 1 to calc_max
+        log_x, log_range = downsample(calc_range[1:],
+                                      np.log(calc_range[1:]), rolls_logx)
 
 """Create the figure for the winrates."""
 
@@ -128,63 +179,69 @@ if wr_graph:
         winrates.yaxis.set_major_formatter(PercentFormatter(xmax=1))
 
     # set the xticks and yticks
-    plt.xticks(wr_xticks)
-    # unfortunately setting the x axis tick labels is harder than it seems when
-    # you want it particular.
-    ticklabels = []
-    for i in wr_xticks:
-        if i in wr_xlabels:
-            ticklabels.append(i)
-        else:
-            ticklabels.append('')
-    winrates.xaxis.set_ticklabels(ticklabels)
+    if wr_xticks is not None:
+        plt.xticks(wr_xticks)
+        # unfortunately setting the x axis tick labels is harder than it seems
+        # when you want it particular.
+        ticklabels = []
+        for i in wr_xticks:
+            if i in wr_xlabels:
+                ticklabels.append(i)
+            else:
+                ticklabels.append('')
+        winrates.xaxis.set_ticklabels(ticklabels)
     plt.yticks(np.arange(0, 1.1, 0.1))
     # and set the background grid
     plt.grid(axis='y', alpha=0.1)
 
-    """Perform the actual data plotting.  The data from [2, 1000] is plotted
-	first with one alpha, for both the calculations and the Monte Carlo data.  
-	The legend is then displayed, and the data for [1, 2] is only plotted 
-	after this, so it doesn't appear on the legend.  It uses a different alpha 
-	value."""
-
-    plt.plot(calc_range[1:], p1_winrate_calc[1:], "-", color="red",
-             alpha=wr_alpha, label="Player 1 Winrate (Exact Formula)")
-    plt.plot(calc_range[1:], p2_winrate_calc[1:], "-", color="blue",
-             alpha=wr_alpha, label="Player 2 Winrate (Exact Formula)")
-    plt.plot(mc_range, p1_winrate_mc, "x", color="darkred", alpha=wr_alpha,
-             label="Player 1 Winrate (Monte Carlo)")
-    plt.plot(mc_range, p2_winrate_mc, "x", color="darkblue", alpha=wr_alpha,
-             label="Player 2 Winrate (Monte Carlo)")
+    """Perform the actual data plotting.  The data from [2, calc_max] is
+	plotted first with one alpha, for both the calculations and the Monte 
+	Carlo data.  The legend is then displayed, and the data for [1, 2] is only 
+	plotted after this, so it doesn't appear on the legend.  It uses a 
+	different alpha value."""
+
+    plt.plot(wr_calc_x, p1_winrate_calc, "-", color="red", alpha=wr_alpha,
+             label="Player 1 Winrate (Exact Formula)")
+    plt.plot(wr_calc_x, p2_winrate_calc, "-", color="blue", alpha=wr_alpha,
+             label="Player 2 Winrate (Exact Formula)")
+    # keep the Monte Carlo lines so that live mode can update them in place
+    p1_winrate_line, = plt.plot(mc_range, p1_winrate_mc, "x",
+                                color="darkred", alpha=wr_alpha,
+                                label="Player 1 Winrate (Monte Carlo)")
+    p2_winrate_line, = plt.plot(mc_range, p2_winrate_mc, "x",
+                                color="darkblue", alpha=wr_alpha,
+                                label="Player 2 Winrate (Monte Carlo)")
     winrates.legend(loc="lower right")
-    plt.plot(calc_range[:2], p1_winrate_calc[:2], "-", color="red",
-             alpha=wr_first_alpha)
-    plt.plot(calc_range[:2], p2_winrate_calc[:2], "-", color="blue",
+    plt.plot(calc_range[:2], drc.p1_winrate(calc_range[:2]), "-", color="red",
              alpha=wr_first_alpha)
+    plt.plot(calc_range[:2], drc.p2_winrate(calc_range[:2]), "-",
+             color="blue", alpha=wr_first_alpha)
 
     """Perform wr graph annotations."""
 
     if wr_annotate:
         annotate("For a 2 sided-die, the smallest\npossible deathroll, "
                  "the current\nroller only has a 33.3% chance \nof winning.",
-                 2, p1_winrate_calc, (1.4, 0))
+                 2, drc.p1_winrate, (1.4, 0))
         annotate("When the die has 5 sides, the \ngap in winrate has already "
                  "substantially\ndecreased: the current roller has \na 46.6% "
-                 "chance at winning.", 5, p1_winrate_calc, (3, 0.175))
+                 "chance at winning.", 5, drc.p1_winrate, (3, 0.175))
         annotate("By /roll 10, this probability \nrises barely above 49%.",
-                 10, p1_winrate_calc, (7, 0.33))
+                 10, drc.p1_winrate, (7, 0.33))
         annotate("At /roll 25, the difference in \nwinrates is less than "
-                 "0.5%.", 25, p2_winrate_calc, (16.2, 0.41))
+                 "0.5%.", 25, drc.p2_winrate, (16.2, 0.41))
         annotate("For a deathroll of 100, \nthe difference in winrates is "
-                 "\nless then 0.02%.", 100, p1_winrate_calc, (65, 0.41))
+                 "\nless then 0.02%.", 100, drc.p1_winrate, (65, 0.41))
         annotate("At /roll 1000, the gap \nbetween winrates is "
-                 "\ninfinitesimal.", 1000, p2_winrate_calc, (625, 0.42))
+                 "\ninfinitesimal.", 1000, drc.p2_winrate, (625, 0.42))
 
         # manually annotate the sample size
         if mc_string != "":
-            plt.annotate("Monte Carlo Sample Size: {}".format(mc_string),
-                         xy=(30, 1), fontsize="xx-large", fontweight="bold",
-                         color="maroon", ha="center")
+            # centered along the x axis whatever calc_max is, at y = 100%
+            wr_mc_note = plt.annotate(
+                "Monte Carlo Sample Size: {}".format(mc_string), xy=(0.5, 1),
+                xycoords=("axes fraction", "data"), fontsize="xx-large",
+                fontweight="bold", color="maroon", ha="center")
 
 
 """Set up the rolls graph."""
@@ -215,28 +272,64 @@ if rolls_graph:
 
     """Plot the data for the rolls."""
 
-    plt.plot(calc_range[1:], avg_rolls_calc[1:], "-", color="green",
-             alpha=rolls_alpha, label="Average Rolls per Game (Exact Formula)")
-    plt.plot(mc_range, avg_rolls_mc, "x", color="darkgreen", alpha=rolls_alpha,
-             label="Average Rolls per Game (Monte Carlo)")
+    plt.plot(rolls_calc_x, avg_rolls_calc, "-", color="green",
+             alpha=rolls_alpha,
+             label="Average Rolls per Game (Exact Formula)")
+    avg_rolls_line, = plt.plot(mc_range, avg_rolls_mc, "x",
+                               color="darkgreen", alpha=rolls_alpha,
+                               label="Average Rolls per Game (Monte Carlo)")
     # Since the functions converge to each other as x approaches infinite, it
     # might be interesting to compare them
     if rolls_log:
-        plt.plot(calc_range[1:], log_range[1:], "-", color="orange",
-                 alpha=rolls_alpha, label="log2")
+        plt.plot(log_x, log_range, "-", color="orange", alpha=rolls_alpha,
+                 label="log2")
     rolls.legend(loc="lower right")
-    plt.plot(calc_range[:2], avg_rolls_calc[:2], "-", color="green",
+    plt.plot(calc_range[:2], drc.avg_rolls(calc_range[:2]), "-", color="green",
              alpha=rolls_first_alpha)
     if rolls_log:
-        plt.plot(calc_range[:2], log_range[:2], "-", color="orange",
+        plt.plot(calc_range[:2], np.log(calc_range[:2]), "-", color="orange",
                  alpha=rolls_first_alpha)
 
     # annotate sample size for the rolls graph
     if mc_string != "":
-        plt.annotate("Monte Carlo Sample Size: {}".format(mc_string),
-                     xy=(500, 9.55), fontsize="xx-large", fontweight="bold",
-                     color="maroon", ha="center")
-
+        # placed relative to the axes, so it stays top center whatever
+        # calc_max and rolls_ymax are
+        rolls_mc_note = plt.annotate(
+            "Monte Carlo Sample Size: {}".format(mc_string), xy=(0.5, 0.955),
+            xycoords="axes fraction", fontsize="xx-large", fontweight="bold",
+            color="maroon", ha="center")
+
+
+"""In live mode, simulate the rest of the samples in steps, updating only the
+Monte Carlo markers and the sample size annotations in place after each step
+rather than redrawing the figures.  Each step adds mc_step games on top of
+what is actually pooled in the store, so nothing is stepped through if the
+store already covers mc_samples."""
+
+
+def pooled_games():
+    return min(mc_store.games(i) for i in mc_range)
+
+
+if mc_live:
+    while pooled_games() < mc_samples:
+        samples = min(pooled_games() + mc_step, mc_samples)
+        mc_data = drs.deathroll_mc(mc_range, samples, store=mc_store)
+        if mc_store.path is not None:
+            mc_store.save()
+        live_text = "Monte Carlo Sample Size: {:,}".format(pooled_games())
+        if wr_graph:
+            p1_winrate_line.set_ydata(mc_data[:, 0])
+            p2_winrate_line.set_ydata(1 - mc_data[:, 0])
+            if wr_annotate and mc_string != "":
+                wr_mc_note.set_text(live_text)
+            winrate_fig.canvas.draw_idle()
+        if rolls_graph:
+            avg_rolls_line.set_ydata(mc_data[:, 1])
+            if mc_string != "":
+                rolls_mc_note.set_text(live_text)
+            rolls_fig.canvas.draw_idle()
+        plt.pause(0.001)  # let the figures process the redraw
 
 # finally, show the graph
 plt.show()
@@ -0,0 +1,269 @@
+"""This file, written by Andrew H. Pometta, is the file responsible for
+simulating gambling sessions: long chains of deathrolls played for gold by the
+same player, with a bankroll that rises and falls with each game.  Unlike
+DRSimulate.py, it does not play out individual deathrolls with DeathrollSim
+objects.  The outcome of each game is drawn directly from the first player's
+winrate, taken either from the exact formulas in DeathrollCalc.py or from the
+Monte Carlo results of DRSimulate.py, which lets a whole block of sessions be
+simulated at once as a 2D Numpy array (one row per session, one column per
+game).
+
+Sessions are simulated in chunks of rows so that memory stays bounded no
+matter how many sessions are asked for.  In the streaming mode only summary
+statistics are kept across chunks, so memory does not grow with the number of
+sessions either.
+"""
+
+import numpy as np
+from collections.abc import Iterable
+import DeathrollCalc as drc
+import DRSimulate as drs
+
+"""Custom exception class for ValueError."""
+
+
+class DRSessionValueError(ValueError):
+    pass
+
+"""Local private function for testing if a number is a positive integer."""
+
+
+def __posint(arg, param="n"):
+    try:
+        arg = int(arg)
+    except (TypeError, ValueError):
+        raise DRSessionValueError("Argument {} for {} cannot be cast "
+                                  "as an integer".format(arg, param))
+    if arg < 1:
+        raise DRSessionValueError(
+            "Argument {} for {} is not positive".format(arg, param))
+    return arg
+
+"""Local private function that turns a per-game argument (a scalar, or an
+iterable with one element per game) into a numpy.ndarray of length games."""
+
+
+def __per_game(arg, games, param):
+    if isinstance(arg, str):
+        raise DRSessionValueError(
+            "Argument {} for {} is a string".format(arg, param))
+    if not isinstance(arg, Iterable):
+        arg = [arg]
+    arg = np.array(list(arg))
+    if len(arg) == 1:
+        arg = np.repeat(arg, games)
+    elif len(arg) != games:
+        raise DRSessionValueError("Argument {} has {} elements but there are "
+                                  "{} games".format(param, len(arg), games))
+    return arg
+
+"""Local private function returning the longest run of True values in each row
+of a 2D boolean array, as a 1D integer array."""
+
+
+def __longest_run(played):
+    count = np.cumsum(played, axis=1, dtype=np.int32)
+    # the count as of the most recent False in the row, carried forwards
+    reset = np.where(played, 0, count)
+    np.maximum.accumulate(reset, axis=1, out=reset)
+    count -= reset
+    return count.max(axis=1)
+
+"""Local private function that simulates a chunk of sessions.  Returns a
+tuple of 1D arrays, one element per session: the final bankroll, the game on
+which the player was ruined (0 if never), the maximum drawdown, the longest
+winning streak and the longest losing streak.  The full-size arrays are
+updated in place wherever possible, so that at most two 8 byte and three 1 byte
+arrays of rows * games cells are alive at once."""
+
+
+def __simulate_chunk(rows, win_p, stakes, bankroll, rng):
+    games = len(win_p)
+    wins = rng.random((rows, games)) < win_p
+    path = np.where(wins, stakes, -stakes)
+    np.cumsum(path, axis=1, out=path)
+    path += bankroll
+    broke = path <= 0
+    ruined = broke.any(axis=1)
+    ruin_index = np.where(ruined, broke.argmax(axis=1), games - 1)
+    del broke
+    # a ruined player stops playing, so every later game is ignored
+    played = np.arange(games) <= ruin_index[:, np.newaxis]
+    np.copyto(path, path[np.arange(rows), ruin_index][:, np.newaxis],
+              where=~played)
+    peak = np.maximum.accumulate(path, axis=1)
+    np.maximum(peak, bankroll, out=peak)
+    peak -= path
+    drawdown = peak.max(axis=1)
+    final = path[:, -1].copy()
+    del path, peak
+    lost = ~wins
+    wins &= played
+    lost &= played
+    return (final, np.where(ruined, ruin_index + 1, 0), drawdown,
+            __longest_run(wins), __longest_run(lost))
+
+"""This function simulates a large number of independent deathroll gambling
+sessions.  In each session the same player plays a chain of games, winning the
+stake of a game from their bankroll if they win it and losing it otherwise.  A
+player is ruined once their bankroll falls to 0 or below, and does not play
+any further games in that session.
+
+n: the number of sides on the initial die of each game.  Either a single
+   positive scalar used for every game, or an iterable with one element per
+   game.
+stakes: the gold wagered on each game.  Like n, a single positive number or
+        an iterable with one per game.  Default 1.
+games: the number of games in each session.  Default 1,000.
+sessions: the number of sessions to simulate.  Default 10,000.
+bankroll: the gold the player starts each session with.  Default 100.
+alternate: if True the player rolls first in the first game, second in the
+           next, and so on.  If False the player always rolls first.  Default
+           False.
+source: where the winrates come from.  "calc" uses the exact formulas in
+        DeathrollCalc, "mc" uses DRSimulate.deathroll_mc.  Default "calc".
+simulations: the sample size passed to deathroll_mc when source is "mc".
+             Default 100,000.
+store: a DRStore.DRResultStore passed to deathroll_mc when source is "mc".
+       Default None.
+stream: if True, only summary statistics are returned rather than one value
+        per session, so memory does not depend on the number of sessions.
+        Default False.
+chunk: the number of sessions simulated at once.  Each chunk peaks at about
+       20 bytes per session per game, so about 40 MB with the default games.
+       Default 2,000.
+seed: seed for numpy.random.default_rng, for reproducible runs.  Default
+      None.
+
+If stream is False, a dictionary of 1D numpy.ndarrays with one element per
+session is returned, with the keys "final" (the final bankroll), "ruin_game"
+(the game on which the player was ruined, counting from 1, or 0 if they never
+were), "max_drawdown" (the largest fall from a previous peak of the
+bankroll), "win_streak" and "loss_streak" (the longest streaks of games won
+and lost).
+
+If stream is True, a dictionary of summary statistics is returned instead:
+"sessions", "ruin_prob", "final_mean", "final_var", "final_min", "final_max",
+"max_drawdown_mean", and "ruin_game_hist", "win_streak_hist" and
+"loss_streak_hist", histograms of length games + 1 where index k counts the
+sessions with that value equal to k.
+
+If any argument is of the wrong type or out of range, or if n or stakes do not
+have one element per game, a DRSessionValueError is raised.
+"""
+
+
+def deathroll_sessions(n, stakes=1, games=1000, sessions=10_000,
+                       bankroll=100, alternate=False, source="calc",
+                       simulations=100_000, store=None, stream=False,
+                       chunk=2_000, seed=None):
+    # check all input
+    games = __posint(games, "games")
+    sessions = __posint(sessions, "sessions")
+    chunk = __posint(chunk, "chunk")
+    n = np.array([__posint(i) for i in __per_game(n, games, "n")])
+    stakes = __per_game(stakes, games, "stakes")
+    try:
+        stakes = stakes.astype(float)
+        bankroll = float(bankroll)
+    except (TypeError, ValueError):
+        raise DRSessionValueError("stakes and bankroll must be numbers")
+    if (stakes <= 0).any() or bankroll <= 0:
+        raise DRSessionValueError("stakes and bankroll must be positive")
+
+    # look up the winrate of each distinct n only once
+    distinct, index = np.unique(n, return_inverse=True)
+    if source == "calc":
+        win_p = drc.p1_winrate(distinct)
+    elif source == "mc":
+        win_p = drs.deathroll_mc(distinct, simulations, store=store)[:, 0]
+    else:
+        raise DRSessionValueError(
+            "Argument {} for source is not \"calc\" or \"mc\"".format(source))
+    win_p = win_p[index]
+    if alternate:
+        win_p[1::2] = 1 - win_p[1::2]
+
+    rng = np.random.default_rng(seed)
+    results = []
+    summary = {"sessions": sessions, "ruin_prob": 0, "final_mean": 0,
+               "final_var": 0, "final_min": np.inf, "final_max": -np.inf,
+               "max_drawdown_mean": 0,
+               "ruin_game_hist": np.zeros(games + 1, dtype=np.int64),
+               "win_streak_hist": np.zeros(games + 1, dtype=np.int64),
+               "loss_streak_hist": np.zeros(games + 1, dtype=np.int64)}
+    final_m2 = 0  # sum of squared deviations from the mean of final
+    done = 0
+    for start in range(0, sessions, chunk):
+        rows = min(chunk, sessions - start)
+        final, ruin_game, drawdown, win_streak, loss_streak = \
+            __simulate_chunk(rows, win_p, stakes, bankroll, rng)
+        if not stream:
+            results.append((final, ruin_game, drawdown, win_streak,
+                            loss_streak))
+            continue
+        summary["ruin_prob"] += np.count_nonzero(ruin_game)
+        # merge the chunk's mean and squared deviations into the running
+        # ones with Chan's parallel update, which stays accurate for large
+        # bankrolls unlike the sum of squares
+        chunk_mean = final.mean()
+        delta = chunk_mean - summary["final_mean"]
+        summary["final_mean"] += delta * rows / (done + rows)
+        final_m2 += (((final - chunk_mean) ** 2).sum() +
+                     delta * delta * done * rows / (done + rows))
+        done += rows
+        summary["final_min"] = min(summary["final_min"], final.min())
+        summary["final_max"] = max(summary["final_max"], final.max())
+        summary["max_drawdown_mean"] += drawdown.sum()
+        for key, values in (("ruin_game_hist", ruin_game),
+                            ("win_streak_hist", win_streak),
+                            ("loss_streak_hist", loss_streak)):
+            summary[key] += np.bincount(values, minlength=games + 1)
+
+    if not stream:
+        keys = ("final", "ruin_game", "max_drawdown", "win_streak",
+                "loss_streak")
+        return {key: np.concatenate([r[i] for r in results])
+                for i, key in enumerate(keys)}
+    summary["ruin_prob"] /= sessions
+    summary["max_drawdown_mean"] /= sessions
+    if sessions > 1:
+        summary["final_var"] = final_m2 / (sessions - 1)
+    return summary
+
+"""If run as a standalone program, simulate sessions at a single starting roll
+and stake and print a summary.  Run the program with the sole option -h to
+see a usage statement."""
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Simulate deathroll "
+                                     "gambling sessions.",
+                                     epilog="Alternatively, import this module"
+                                     " and use the deathroll_sessions "
+                                     "function in another Python program.")
+    parser.add_argument("-g", action="store", default=1000, type=int,
+                        metavar="games", help="games per session "
+                        "(default: 1000)")
+    parser.add_argument("-s", action="store", default=10_000, type=int,
+                        metavar="sessions", help="number of sessions "
+                        "(default: 10000)")
+    parser.add_argument("-b", action="store", default=100, type=float,
+                        metavar="bankroll", help="starting bankroll "
+                        "(default: 100)")
+    parser.add_argument("-k", action="store", default=1, type=float,
+                        metavar="stake", help="stake per game (default: 1)")
+    parser.add_argument("-a", "--alternate", action="store_true",
+                        help="alternate who rolls first each game")
+    parser.add_argument("n", action="store", type=int,
+                        help="number of sides on the initial die")
+    args = parser.parse_args()
+
+    try:
+        summary = deathroll_sessions(args.n, args.k, args.g, args.s, args.b,
+                                     args.alternate, stream=True)
+    except DRSessionValueError as dse:
+        parser.error(str(dse))
+    print("Over {} sessions of {} games at /roll {}, the player is ruined "
+          "{:.3%} of the time and finishes with an average bankroll of "
+          "{:.2f}.".format(args.s, args.g, args.n, summary["ruin_prob"],
+                           summary["final_mean"]))
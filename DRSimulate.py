@@ -13,6 +13,8 @@ want anything more complicated (spreadsheet/database), write it yourself.
 
 from time import perf_counter  # new version of time.clock()
 import sys
+from random import Random
+from random import SystemRandom
 import DeathrollSim as drs
 import numpy as np
 from collections.abc import Iterable
@@ -43,11 +45,50 @@ def __posint(arg, param="n"):
             "Argument {} for {} is not positive".format(arg, param))
     return arg
 
+"""Local private function that simulates a number of games for a single
+starting roll and returns the running sums (p1 wins, sum of roll counts,
+sum of squared roll counts) as integers, followed by the roll count histogram
+and the p1 wins per roll count histogram.  The histograms are None unless
+max_len is positive, in which case they are numpy.ndarrays of max_len + 1
+bins, the last of which counts every game of max_len rolls or more.  Roll
+counts are only buffered for one batch of games at a time before being added
+to the histograms with np.bincount, so memory stays O(max_len + batch).  If
+rng is given, it is the random.Random the dice are rolled with."""
+
+
+def __simulate(n, simulations, max_len=0, batch=100_000, rng=None):
+    p1_wins = 0
+    roll_sum = 0
+    roll_sq_sum = 0
+    hist = p1_hist = None
+    if max_len > 0:
+        hist = np.zeros(max_len + 1, dtype=np.int64)
+        p1_hist = np.zeros(max_len + 1, dtype=np.int64)
+    counts = []
+    winners = []
+    for j in range(simulations):
+        dr = drs.DeathrollSim(n, rng=rng)
+        p1_wins += 1 if dr.winner == 1 else 0
+        roll_sum += dr.roll_count
+        roll_sq_sum += dr.roll_count * dr.roll_count
+        if hist is None:
+            continue
+        counts.append(min(dr.roll_count, max_len))
+        winners.append(dr.winner == 1)
+        if len(counts) == batch or j == simulations - 1:
+            hist += np.bincount(counts, minlength=max_len + 1)
+            p1_hist += np.bincount(counts, weights=winners,
+                                   minlength=max_len + 1).astype(np.int64)
+            counts = []
+            winners = []
+    return p1_wins, roll_sum, roll_sq_sum, hist, p1_hist
+
 """This function performs Monte Carlo simulation of a large amount of 
 deathroll games, and returns a 2D numpy.ndarray corresponding to results of 
 the simulation.  Each list on the zeroth axis of this array is a pair, the 
 first of which corresponds to the first player's winrate for a given starting 
-die of n sides, and the second is the average number of rolls.
+die of n sides, and the second is the average number of rolls.  If max_len 
+is given, the roll count histograms are returned alongside it (see below).
 
 n: the number of sides on the initial die rolled.  This can either be a 
    single positive scalar, or a data structure that is Iterable (e.g. a list, 
@@ -68,6 +109,23 @@ time_each: whether to print timing information (how long it took to perform
 outfile: the open file object (NOT pathname or string) to print timing info 
          to.  If neither time_each or time_all is specified, this option is 
          ignored.  Default sys.stdout.
+store: a DRStore.DRResultStore to pool the results with.  If given, only the 
+       shortfall between simulations and the games already in the store for 
+       each n is simulated, under a private random.Random seeded with a fresh 
+       stream id that is recorded in the store (the random module's global 
+       state is left alone).  The returned values are then the pooled 
+       estimates from the store.  Saving the store is left to the caller.  
+       Default None.
+max_len: if positive, also accumulate the histogram of roll counts and of 
+         first player wins per roll count, with max_len + 1 bins where the 
+         last bin counts every game of max_len rolls or more.  The return 
+         value is then a tuple (data, hist, p1_hist), where hist[i][k] is the 
+         number of games with initial die n[i] that took k rolls, and 
+         p1_hist[i][k] how many of those the first player won.  No per-game 
+         records are kept.  With a store, the histograms are merged into and 
+         read back from it, and a DRStore.DRStoreValueError is raised, 
+         before the store is changed, if the games already stored for any n 
+         have no histogram of at least max_len + 1 bins.  Default 0.
 
 If simulations, n itself (not iterable) or any element within (iterable) 
 cannot be casted as an integer, or is not positive, or if time_all or 
@@ -79,9 +137,11 @@ iterable, it is equivalent to marking only one as True.
 
 
 def deathroll_mc(n, simulations=100_000, time_all=False, time_each=False,
-                 outfile=sys.stdout):
+                 outfile=sys.stdout, store=None, max_len=0):
     # check all input except outfile
     simulations = __posint(simulations, "simulations")
+    if max_len != 0:
+        max_len = __posint(max_len, "max_len")
     try:
         time_all = bool(time_all)
     except ValueError:
@@ -97,6 +157,13 @@ def deathroll_mc(n, simulations=100_000, time_all=False, time_each=False,
     else:
         for i in n:
             __posint(i)  # don't actually change the number - just type check
+    # make sure the store can give back every histogram before anything is
+    # simulated and merged into it: merging games without a histogram would
+    # drop the stored one for good
+    if store is not None and max_len > 0:
+        for i in (n if isinstance(n, Iterable) else [n]):
+            if store.games(i) > 0:
+                store.histogram(i, max_len)
 
     # start timing if relevant
     try:
@@ -112,21 +179,37 @@ def deathroll_mc(n, simulations=100_000, time_all=False, time_each=False,
                 range_timer = perf_counter()
         # n is a range, iterate through it
         data = np.array([])
+        hist = []
+        p1_hist = []
         for i in n:
             if time_each:  # start individual timer
                 unit_timer = perf_counter()
-            p1_wins = 0
-            roll_count = 0
-            for j in range(simulations):
-                dr = drs.DeathrollSim(__posint(i))
-                p1_wins += 1 if dr.winner == 1 else 0
-                roll_count += dr.roll_count
-            data = np.append(data, [p1_wins / simulations,  # append data
-                                    roll_count / simulations])
+            shortfall = simulations
+            if store is None:
+                p1_wins, roll_count, _, i_hist, i_p1_hist = __simulate(
+                    __posint(i), simulations, max_len)
+                data = np.append(data, [p1_wins / simulations,  # append data
+                                        roll_count / simulations])
+            else:
+                shortfall = max(simulations - store.games(i), 0)
+                if shortfall > 0:
+                    # seed the stream ourselves so it can be told apart from
+                    # every other batch of games merged into the store
+                    stream = SystemRandom().getrandbits(64)
+                    sums = __simulate(__posint(i), shortfall, max_len,
+                                      rng=Random(stream))
+                    store.add(i, shortfall, *sums[:3], streams=[stream],
+                              hist=sums[3], p1_hist=sums[4])
+                data = np.append(data, store.estimate(i)[0])
+                if max_len > 0:
+                    i_hist, i_p1_hist = store.histogram(i, max_len)
+            if max_len > 0:
+                hist.append(i_hist)
+                p1_hist.append(i_p1_hist)
             if time_each:
                 print("Monte Carlo simulation of {} samples for inital roll "
                       "of {}-sided die complete.  Time elapsed: {}s.".format(
-                          simulations, __posint(i),
+                          shortfall, __posint(i),
                           perf_counter() - unit_timer))
         if time_all:
             print("Monte Carlo simulation across {} complete.  Time "
@@ -140,6 +223,8 @@ def deathroll_mc(n, simulations=100_000, time_all=False, time_each=False,
 
     # reshape array properly
     data = data.reshape(len(data) // 2, 2)
+    if max_len > 0:
+        return data, np.array(hist), np.array(p1_hist)
     return data
 
 """If run as a standalone program, take in options and input into the
@@ -176,6 +261,14 @@ if __name__ == "__main__":
                         default=100_000, help="number of simulations to run "
                         "per n-sided die (default: 100000)",
                         metavar="simulations", type=__posint)
+    parser.add_argument("-f", action="store", default=None,
+                        help="store file to pool results with; only the "
+                        "shortfall is simulated and the file is updated",
+                        metavar="store")
+    parser.add_argument("-l", action="store", default=0,
+                        help="also print the roll count histogram, with the "
+                        "last bin counting games of at least this many rolls",
+                        metavar="max_len", type=__posint)
     parser.add_argument("n", action="store", help="the smallest (or only) "
                         "number of sides for all dice", type=__posint)
 
@@ -184,7 +277,24 @@ if __name__ == "__main__":
     # perfectly with argparse than it seems
 
     # Run simulation and print relevant data
-    data = deathroll_mc(args.n, args.s, args.time)
+    import DRStore
+    store = None
+    try:
+        if args.f is not None:
+            store = DRStore.DRResultStore(args.f)
+        data = deathroll_mc(args.n, args.s, args.time, store=store,
+                            max_len=args.l)
+        if store is not None:
+            store.save()
+    except (DRSimulateValueError, DRStore.DRStoreValueError,
+            DRStore.DRStoreFileError) as error:
+        parser.error(str(error))
+    if args.l > 0:
+        data, hist, p1_hist = data
+        print("Rolls\tGames\tPlayer 1 wins")
+        for k in range(args.l + 1):
+            print("{}{}\t{}\t{}".format(k, "+" if k == args.l else "",
+                                        hist[0][k], p1_hist[0][k]))
     print("With initial die of {} sides, player 1 wins {:.3%} of the time "
           "with an average of {:.4f} rolls per game.".format(args.n,
                                                              data[0][0],
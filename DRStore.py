@@ -0,0 +1,297 @@
+"""This file, written by Andrew H. Pometta, is the file implementing and
+exporting the DRResultStore class.  A store keeps the running sums of every
+Monte Carlo simulation performed for each starting roll number (n), so that
+samples from separate runs of DRSimulate.deathroll_mc can be pooled together
+instead of being thrown away once a run finishes.
+
+For each n the store keeps 5 things: the number of games, the number of games
+won by the first player, the sum of the roll counts, the sum of the squares
+of the roll counts, and the ids of the random number streams (seeds) that
+produced those games.  The sums are kept as regular Python integers, so they
+are exact no matter how many games are added.  The stream ids are used to
+refuse merging the same batch of games in twice.  Optionally, the store also
+keeps the histogram of roll counts and of first player wins per roll count,
+as long as every game stored for that n came with one.
+
+Stores are saved to and loaded from a basic .txt file, one line per n.
+"""
+
+import os
+import shutil
+import tempfile
+import numpy as np
+from collections.abc import Iterable
+
+"""Custom exception class for ValueError."""
+
+
+class DRStoreValueError(ValueError):
+    pass
+
+"""Custom exception class for file handling."""
+
+
+class DRStoreFileError(OSError):
+    pass
+
+"""
+The DRResultStore class holds the accumulated Monte Carlo sums for any number
+of starting rolls.  Pass an instance of it to DRSimulate.deathroll_mc with the
+store argument to have new simulations merged into it: only the shortfall
+between the requested sample size and the games already stored is simulated.
+
+Relevant public properties:
+  path: the pathname the store was loaded from and is saved to by default.
+        None if the store only lives in memory.
+"""
+
+
+class DRResultStore:
+    """The constructor creates an empty store, then loads the file at path
+    into it if one was given and the file exists.  A missing file is not an
+    error, as the first run of a sweep will not have one yet.
+
+    path: the pathname of the store file.  Default None."""
+
+    def __init__(self, path=None):
+        # maps n to [games, p1_wins, roll_sum, roll_sq_sum, [stream ids],
+        # hist, p1_hist], where the histograms are None if not kept
+        self.__data = {}
+        self.path = path
+        if path is not None:
+            try:
+                with open(path) as infile:
+                    self.__read(infile)
+            except FileNotFoundError:
+                pass
+            except OSError as ose:
+                raise DRStoreFileError(str(ose))
+
+    """Private method for testing if a number is a non-negative integer.
+    Numbers with a fractional part are rejected rather than truncated."""
+
+    def __count(self, arg, param):
+        try:
+            value = int(arg)
+            if value != arg and not isinstance(arg, str):
+                raise ValueError
+        except (TypeError, ValueError):
+            raise DRStoreValueError("Argument {} for {} cannot be cast "
+                                    "as an integer".format(arg, param))
+        arg = value
+        if arg < 0:
+            raise DRStoreValueError(
+                "Argument {} for {} is negative".format(arg, param))
+        return arg
+
+    """Private method for testing if a number is a positive integer."""
+
+    def __posint(self, arg, param="n"):
+        arg = self.__count(arg, param)
+        if arg < 1:
+            raise DRStoreValueError(
+                "Argument {} for {} is not positive".format(arg, param))
+        return arg
+
+    """Parses the lines of an open store file into this store."""
+
+    def __read(self, infile):
+        for line_no, line in enumerate(infile, 1):
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            fields = line.split()
+            if len(fields) not in (6, 8):
+                raise DRStoreValueError("Line {} of the store file does not "
+                                        "have 6 or 8 fields".format(line_no))
+            fields += ["-"] * (8 - len(fields))
+            streams, hist, p1_hist = [
+                None if f == "-" else f.split(",") for f in fields[5:]]
+            self.add(*fields[:5], streams=streams or [], hist=hist,
+                     p1_hist=p1_hist)
+
+    """Merges the results of games into the store.
+
+    n: the number of sides on the initial die of the games.
+    games: the number of games played.
+    p1_wins: how many of those games the first player won.
+    roll_sum: the sum of the roll counts of those games.
+    roll_sq_sum: the sum of the squares of the roll counts of those games.
+    streams: an iterable of the ids of the random streams the games came
+             from.  Default empty.
+    hist: the histogram of roll counts of those games, an iterable whose kth
+          element is the number of games with k rolls, except the last which
+          counts every game of at least that many rolls.  If the entry
+          already has a histogram of a different length, both are folded
+          into the shorter one.  If hist is None, the histogram of the entry
+          is dropped, as it would no longer cover every game.  Default None.
+    p1_hist: the same as hist, for the games won by the first player.  Must
+             be given if and only if hist is.  Default None.
+
+    If any count is not castable as a non-negative integer, if n is not
+    positive, if p1_wins is greater than games, if the histograms do not
+    match the counts, or if any stream id is already in the store for n, a
+    DRStoreValueError is raised and the store is left unchanged."""
+
+    def add(self, n, games, p1_wins, roll_sum, roll_sq_sum, streams=(),
+            hist=None, p1_hist=None):
+        n = self.__posint(n)
+        games = self.__count(games, "games")
+        p1_wins = self.__count(p1_wins, "p1_wins")
+        roll_sum = self.__count(roll_sum, "roll_sum")
+        roll_sq_sum = self.__count(roll_sq_sum, "roll_sq_sum")
+        streams = [self.__count(s, "streams") for s in streams]
+        if p1_wins > games:
+            raise DRStoreValueError("p1_wins ({}) is greater than games "
+                                    "({})".format(p1_wins, games))
+        if (hist is None) != (p1_hist is None):
+            raise DRStoreValueError("hist and p1_hist must be given together")
+        if hist is not None:
+            hist = np.array([self.__count(k, "hist") for k in hist],
+                            dtype=np.int64)
+            p1_hist = np.array([self.__count(k, "p1_hist") for k in p1_hist],
+                               dtype=np.int64)
+            if (len(hist) != len(p1_hist) or len(hist) < 2 or
+                    hist.sum() != games or p1_hist.sum() != p1_wins or
+                    (p1_hist > hist).any()):
+                raise DRStoreValueError("hist and p1_hist do not match the "
+                                        "games for n={}".format(n))
+        entry = self.__data.get(n, [0, 0, 0, 0, [], None, None])
+        repeated = sorted(set(s for s in streams if streams.count(s) > 1))
+        if repeated:
+            raise DRStoreValueError("Stream ids {} for n={} are given more "
+                                    "than once".format(repeated, n))
+        overlap = set(streams).intersection(entry[4])
+        if overlap:
+            raise DRStoreValueError("Stream ids {} for n={} were already "
+                                    "merged".format(sorted(overlap), n))
+        if entry[0] > 0 and entry[5] is None:
+            hist = p1_hist = None  # earlier games have no histogram
+        elif entry[0] > 0 and hist is not None:
+            length = min(len(hist), len(entry[5]))
+            hist = self.__fold(hist, length) + self.__fold(entry[5], length)
+            p1_hist = (self.__fold(p1_hist, length) +
+                       self.__fold(entry[6], length))
+        self.__data[n] = [entry[0] + games, entry[1] + p1_wins,
+                          entry[2] + roll_sum, entry[3] + roll_sq_sum,
+                          entry[4] + streams, hist, p1_hist]
+
+    """Merges every entry of another DRResultStore into this one.  The same
+    rules as add apply, so merging a store into one that already holds any
+    of its streams raises a DRStoreValueError."""
+
+    def merge(self, other):
+        for n, entry in other.entries():
+            self.add(n, *entry[:4], streams=entry[4], hist=entry[5],
+                     p1_hist=entry[6])
+
+    """Returns a sorted list of (n, [games, p1_wins, roll_sum, roll_sq_sum,
+    streams, hist, p1_hist]) pairs for every n in the store.  The lists and
+    histograms are copies."""
+
+    def entries(self):
+        return [(n, self.__data[n][:4] + [list(self.__data[n][4])] +
+                 [None if h is None else h.copy()
+                  for h in self.__data[n][5:]])
+                for n in sorted(self.__data)]
+
+    """Folds a histogram into length bins, adding every bin from the last
+    one onwards into the last bin."""
+
+    def __fold(self, hist, length):
+        return np.append(hist[:length - 1], hist[length - 1:].sum())
+
+    """Returns the roll count histogram and the first player wins histogram
+    for n, as a pair of numpy.ndarrays of max_len + 1 bins, the last of which
+    counts every game of at least max_len rolls.  If n has no games, or its
+    games have no histogram of at least max_len + 1 bins, a
+    DRStoreValueError is raised."""
+
+    def histogram(self, n, max_len):
+        entry = self.__entry(n)
+        length = self.__posint(max_len, "max_len") + 1
+        if entry[5] is None or len(entry[5]) < length:
+            raise DRStoreValueError("The games stored for n={} have no "
+                                    "histogram of max_len {}".format(
+                                        n, max_len))
+        return self.__fold(entry[5], length), self.__fold(entry[6], length)
+
+    """Returns the number of games stored for n, 0 if there are none."""
+
+    def games(self, n):
+        return self.__data.get(self.__posint(n), [0])[0]
+
+    """Returns the pooled estimate for n as a 2D numpy.ndarray in the same
+    layout as DRSimulate.deathroll_mc: each pair is the first player's
+    winrate and the average number of rolls.  n can be a single positive
+    scalar or an iterable of them.  If any n has no games stored, a
+    DRStoreValueError is raised."""
+
+    def estimate(self, n):
+        if not isinstance(n, Iterable):
+            n = [n]
+        data = np.array([])
+        for i in n:
+            games, p1_wins, roll_sum = self.__entry(i)[:3]
+            data = np.append(data, [p1_wins / games, roll_sum / games])
+        return data.reshape(len(data) // 2, 2)
+
+    """Returns the sample variance of the roll count for n, as a float.  At
+    least 2 games must be stored, otherwise a DRStoreValueError is raised."""
+
+    def rolls_var(self, n):
+        games, _, roll_sum, roll_sq_sum = self.__entry(n)[:4]
+        if games < 2:
+            raise DRStoreValueError("At least 2 games are needed for the "
+                                    "variance of n={}".format(n))
+        # exact integers up to the final division
+        return ((games * roll_sq_sum - roll_sum * roll_sum) /
+                (games * (games - 1)))
+
+    """Returns the entry for n, raising a DRStoreValueError if empty."""
+
+    def __entry(self, n):
+        n = self.__posint(n)
+        if self.games(n) == 0:
+            raise DRStoreValueError("No games stored for n={}".format(n))
+        return self.__data[n]
+
+    """Writes the store to the file at path, or to self.path if path is not
+    given.  The store is written to a temporary file in the same directory
+    first, which then replaces path in one step, so an interrupted save
+    leaves the previous file intact.  Any OSError is raised as a
+    DRStoreFileError."""
+
+    def save(self, path=None):
+        path = self.path if path is None else path
+        if path is None:
+            raise DRStoreValueError("No path given to save the store to")
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(path)),
+                prefix=os.path.basename(path) + ".", suffix=".tmp")
+            with os.fdopen(fd, "w") as outfile:
+                outfile.write("# n games p1_wins roll_sum roll_sq_sum "
+                              "streams hist p1_hist\n")
+                for n, entry in self.entries():
+                    lists = [",".join(str(k) for k in f) or "-"
+                             if f is not None else "-" for f in entry[4:]]
+                    outfile.write("{} {} {} {} {} {} {} {}\n".format(
+                        n, *entry[:4], *lists))
+                outfile.flush()
+                os.fsync(outfile.fileno())
+            if os.path.exists(path):
+                shutil.copymode(path, temp_path)
+            os.replace(temp_path, path)
+        except OSError as ose:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise DRStoreFileError(str(ose))
+
+    """Printing method for a DRResultStore used for developers and
+	debugging."""
+
+    def __repr__(self):
+        return "DRResultStore (path: {}, n: {})".format(
+            self.path, sorted(self.__data))
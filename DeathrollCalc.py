@@ -62,66 +62,53 @@ def __posint(arg, param="n"):
     return arg
 
 
-"""Function for either fetching or, if not previously requested, calculating
-the sum of all P_w1(k) in the range [2, k].  Note that P_w1(n) is just
-1 - P_l1(n)."""
-
-
-def __sig_p_w1(n):
-    n = __posint(n)
-    global __sig_p_w1_n
-    try:
-        return __sig_p_w1_n[n - 1]
-    except IndexError:  # We haven't done this yet, so we calculate it
-        # the recursive way
-        total = __sig_p_w1(n - 1) + (1 - __p_l1(n))
-        __sig_p_w1_n = np.append(__sig_p_w1_n, total)  # update cache
-        return total
-
-
-"""Function for either fetching or, if not previously requested, calculating
-P_l1(n)."""
-
-
-def __p_l1(n):
-    n = __posint(n)
-    global __p_l1_n
-    try:
-        return __p_l1_n[n - 1]
-    except IndexError:  # calculate new P_l1(n)
-        total = (2 + __sig_p_w1(n - 1)) / (n + 1)
-        __p_l1_n = np.append(__p_l1_n, total)
-        return total
-
-
-"""Function for either fetching or, if not previously requested, caluclating
-the sum of all R(k) in the range [2, k]."""
-
-
-def __sig_r(n):
-    n = __posint(n)
-    global __sig_r_n
-    try:
-        return __sig_r_n[n - 1]
-    except IndexError:
-        total = __sig_r(n - 1) + __r(n)
-        __sig_r_n = np.append(__sig_r_n, total)
-        return total
-
-
-"""Function for either fetching or, if not previously requested, calculating
-R(n)."""
-
-
-def __r(n):
-    n = __posint(n)
-    global __r_n
-    try:
-        return __r_n[n - 1]
-    except IndexError:
-        total = (n + __sig_r(n - 1)) / (n - 1)
-        __r_n = np.append(__r_n, total)
-        return total
+"""Function for extending all four caches so that they cover at least n.  The
+recurrences are run in a single plain loop and the caches are replaced in one
+step, growing to at least double their size, so that building a table of
+length n is O(n) rather than reallocating the caches on every new value."""
+
+
+def __extend(n):
+    global __p_l1_n, __sig_p_w1_n, __r_n, __sig_r_n
+    known = len(__p_l1_n)
+    if n <= known:
+        return
+    n = max(n, 2 * known)
+    p_l1 = np.empty(n - known)
+    sig_p_w1 = np.empty(n - known)
+    r = np.empty(n - known)
+    sig_r = np.empty(n - known)
+    sig_p_w1_prev = float(__sig_p_w1_n[-1])
+    sig_r_prev = float(__sig_r_n[-1])
+    for i, k in enumerate(range(known + 1, n + 1)):
+        p_l1[i] = (2 + sig_p_w1_prev) / (k + 1)
+        sig_p_w1_prev += 1 - p_l1[i]
+        sig_p_w1[i] = sig_p_w1_prev
+        r[i] = (k + sig_r_prev) / (k - 1)
+        sig_r_prev += r[i]
+        sig_r[i] = sig_r_prev
+    __p_l1_n = np.concatenate((__p_l1_n, p_l1))
+    __sig_p_w1_n = np.concatenate((__sig_p_w1_n, sig_p_w1))
+    __r_n = np.concatenate((__r_n, r))
+    __sig_r_n = np.concatenate((__sig_r_n, sig_r))
+
+
+"""Function for validating n, which can be a single value or an iterable, and
+returning the zero-based cache indices for it as a scalar or np.ndarray, after
+making sure the caches cover it."""
+
+
+def __index(n):
+    if not isinstance(n, Iterable):
+        n = __posint(n)
+        __extend(n)
+        return n - 1
+    # If they give something like a dictionary or set, it's their own fault
+    # for not ordering it
+    n = np.array([__posint(i) for i in n], dtype=np.int64)
+    if len(n) > 0:
+        __extend(int(n.max()))
+    return n - 1
 
 """User-accessible functions begin here.  They are mostly wrappers around the
 above functions in one way or another."""
@@ -136,17 +123,10 @@ DeathrollCalcValueError is returned."""
 
 
 def p1_winrate(n):
-    # handle the instance of a single value being given.  if it's not a valid
-    # input, __p_l1 will raise the error
-    if not isinstance(n, Iterable):
-        return 1 - __p_l1(n)
-    else:
-        # do the same for an iterable input really.  If they give something
-        # like a dictionary or set, it's their own fault for not ordering it
-        data = np.array([])
-        for i in n:
-            data = np.append(data, 1 - __p_l1(i))
-        return data
+    # a single value gives a single value back, and an iterable an np.ndarray.
+    # The index must be found first, as it may replace the cache
+    index = __index(n)
+    return 1 - __p_l1_n[index]
 
 
 """Same as p1_winrate, but for player 2.  Takes identical arguments."""
@@ -160,10 +140,5 @@ and behavior as p1_winrate."""
 
 
 def avg_rolls(n):
-    if not isinstance(n, Iterable):
-        return __r(n)
-    else:
-        data = np.array([])
-        for i in n:
-            data = np.append(data, __r(i))
-        return data
+    index = __index(n)
+    return __r_n[index]
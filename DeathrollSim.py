@@ -45,9 +45,12 @@ class DeathrollSim:
     start_roll: a positive integer corresponding to the number of sides of 
                         the initial die
     log_rolls: a boolean of whether or not to store the exact sequence of 
-               rolls in a game in a list.  Default False"""
+               rolls in a game in a list.  Default False
+    rng: a random.Random instance to roll the dice with, so that a caller can 
+         use its own seeded stream without touching the random module's 
+         global state.  Default None, which uses the random module."""
 
-    def __init__(self, start_roll, log_rolls=False):
+    def __init__(self, start_roll, log_rolls=False, rng=None):
         # check for valid input
         try:
             start_roll = int(start_roll)
@@ -65,6 +68,7 @@ class DeathrollSim:
         self.__first_rolling = True
         self.__detailed = log_rolls
         self.__n = start_roll
+        self.__randint = randint if rng is None else rng.randint
         # public properties
         self.initial_n = start_roll
         self.roll_count = 0
@@ -89,7 +93,7 @@ class DeathrollSim:
     def __roll(self, reset_seed=False):
         if reset_seed:
             seed()
-        self.__n = randint(1, self.__n)
+        self.__n = self.__randint(1, self.__n)
         self.roll_count += 1
         if self.__detailed:
             self.roll_sequence.append(self.__n)
@@ -0,0 +1,66 @@
+"""Tests for DRDownsample.py."""
+
+import numpy as np
+import pytest
+
+from DRDownsample import downsample, DRDownsampleValueError
+
+
+def line(length, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(1, length + 1), rng.normal(size=length)
+
+
+@pytest.mark.parametrize("method", ["log", "minmax"])
+@pytest.mark.parametrize("length", [1761, 10_000, 3_000_001])
+def test_at_most_points_kept_with_ends_and_increasing_x(method, length):
+    x, y = line(length)
+    small_x, small_y = downsample(x, y, 1760, method)
+    assert len(small_x) == len(small_y) <= 1760
+    assert small_x[0] == x[0] and small_x[-1] == x[-1]
+    assert small_y[0] == y[0] and small_y[-1] == y[-1]
+    assert (np.diff(small_x) > 0).all()
+    # every kept point is a point of the original line
+    np.testing.assert_array_equal(small_y, y[small_x - 1])
+
+
+@pytest.mark.parametrize("length", [1000, 1003, 5000])
+def test_minmax_keeps_every_bucket_extreme(length):
+    x, y = line(length, seed=length)
+    points = 100
+    small_x, small_y = downsample(x, y, points)
+    buckets = (points - 2) // 2
+    size = -(-length // buckets)
+    kept = set(small_x.tolist())
+    for start in range(0, length, size):
+        bucket = slice(start, min(start + size, length))
+        # the last bucket is shorter and was padded internally
+        for extreme in (y[bucket].min(), y[bucket].max()):
+            matches = x[bucket][y[bucket] == extreme]
+            assert kept.intersection(matches.tolist())
+
+
+def test_minmax_keeps_a_spike():
+    x = np.arange(1, 1_000_001)
+    y = np.sin(x / 1000)
+    y[777_776] = 5
+    small_x, small_y = downsample(x, y, 200)
+    assert small_y.max() == 5
+    assert 777_777 in small_x
+
+
+@pytest.mark.parametrize("method", ["log", "minmax"])
+def test_short_lines_and_no_points_pass_through(method):
+    x, y = line(50)
+    for points in (50, 51, 0, -1):
+        small_x, small_y = downsample(x, y, points, method)
+        np.testing.assert_array_equal(small_x, x)
+        np.testing.assert_array_equal(small_y, y)
+
+
+def test_bad_arguments_are_rejected():
+    x, y = line(10)
+    with pytest.raises(DRDownsampleValueError):
+        downsample(x, y[:-1], 5)
+    with pytest.raises(DRDownsampleValueError):
+        downsample(x, y, 5, "auto")
@@ -0,0 +1,62 @@
+"""Tests for DRSession.py."""
+
+import numpy as np
+import pytest
+
+from DRSession import deathroll_sessions, DRSessionValueError
+
+
+def test_always_losing_player_is_ruined():
+    # with a 1-sided die the first roller has already lost
+    result = deathroll_sessions(1, games=10, sessions=4, bankroll=3)
+    assert result["final"].tolist() == [0, 0, 0, 0]
+    assert result["ruin_game"].tolist() == [3, 3, 3, 3]
+    assert result["max_drawdown"].tolist() == [3, 3, 3, 3]
+    assert result["win_streak"].tolist() == [0, 0, 0, 0]
+    assert result["loss_streak"].tolist() == [3, 3, 3, 3]
+
+
+def test_alternating_player_breaks_even():
+    result = deathroll_sessions(1, stakes=[2, 2, 2, 2, 2, 2], games=6,
+                                sessions=3, bankroll=3, alternate=True)
+    assert result["final"].tolist() == [3, 3, 3]
+    assert result["ruin_game"].tolist() == [0, 0, 0]
+    assert result["max_drawdown"].tolist() == [2, 2, 2]
+    assert result["win_streak"].tolist() == [1, 1, 1]
+    assert result["loss_streak"].tolist() == [1, 1, 1]
+
+
+def test_stream_mode_matches_full_mode_for_any_chunk():
+    kwargs = dict(n=[2, 50], games=2, sessions=5000, bankroll=1e9,
+                  stakes=[1e6, 3e6], seed=3)
+    full = deathroll_sessions(**kwargs)
+    for chunk in (5000, 700, 1):
+        summary = deathroll_sessions(stream=True, chunk=chunk, **kwargs)
+        assert summary["sessions"] == 5000
+        assert summary["ruin_prob"] == np.mean(full["ruin_game"] > 0)
+        assert summary["final_mean"] == pytest.approx(full["final"].mean())
+        assert summary["final_var"] == pytest.approx(
+            full["final"].var(ddof=1))
+        assert summary["final_min"] == full["final"].min()
+        assert summary["max_drawdown_mean"] == pytest.approx(
+            full["max_drawdown"].mean())
+        np.testing.assert_array_equal(
+            summary["loss_streak_hist"],
+            np.bincount(full["loss_streak"], minlength=3))
+
+
+def test_winrate_matches_the_exact_formula():
+    result = deathroll_sessions(2, games=1, sessions=20_000, seed=1)
+    # the first roller of a 2-sided die wins a third of the time
+    assert np.mean(result["final"] > 100) == pytest.approx(1 / 3, abs=0.02)
+
+
+def test_bad_arguments_are_rejected():
+    with pytest.raises(DRSessionValueError):
+        deathroll_sessions("abc", games=3, sessions=1)
+    with pytest.raises(DRSessionValueError):
+        deathroll_sessions([2, 3], games=3, sessions=1)
+    with pytest.raises(DRSessionValueError):
+        deathroll_sessions(2, stakes=0, games=3, sessions=1)
+    with pytest.raises(DRSessionValueError):
+        deathroll_sessions(2, games=3, sessions=1, source="guess")
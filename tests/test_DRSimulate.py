@@ -0,0 +1,54 @@
+"""Tests for the roll count histograms of DRSimulate.deathroll_mc."""
+
+import numpy as np
+import pytest
+
+import DRSimulate as drs
+from DRStore import DRResultStore, DRStoreValueError
+
+
+def test_histograms_match_the_means():
+    data, hist, p1_hist = drs.deathroll_mc([2, 30], 3000, max_len=200)
+    assert hist.shape == p1_hist.shape == (2, 201)
+    assert (hist.sum(axis=1) == 3000).all()
+    np.testing.assert_allclose(p1_hist.sum(axis=1) / 3000, data[:, 0])
+    np.testing.assert_allclose(hist @ np.arange(201) / 3000, data[:, 1])
+    # the first player can only win on an even roll count
+    assert p1_hist[:, 1::2].sum() == 0
+    assert (p1_hist[:, 2::2] == hist[:, 2::2]).all()
+
+
+def test_last_bin_counts_longer_games():
+    data, hist, p1_hist = drs.deathroll_mc(1000, 500, max_len=3)
+    assert hist.shape == (1, 4)
+    assert hist[0].sum() == 500
+    assert hist[0][3] > 0
+    assert drs.deathroll_mc(1, 10, max_len=2)[1].tolist() == [[10, 0, 0]]
+
+
+def test_histograms_merge_through_the_store():
+    store = DRResultStore()
+    drs.deathroll_mc(20, 300, store=store, max_len=8)
+    data, hist, p1_hist = drs.deathroll_mc(20, 700, store=store, max_len=5)
+    assert hist[0].sum() == store.games(20) == 700
+    assert p1_hist[0].sum() == round(data[0][0] * 700)
+    # the 8 bin histogram was folded into the shorter one
+    with pytest.raises(DRStoreValueError):
+        store.histogram(20, 6)
+
+
+def test_missing_histogram_is_refused_before_simulating():
+    store = DRResultStore()
+    drs.deathroll_mc(20, 100, store=store)
+    with pytest.raises(DRStoreValueError):
+        drs.deathroll_mc(20, 200, store=store, max_len=5)
+    assert store.games(20) == 100
+
+
+def test_short_histogram_is_refused_before_simulating():
+    store = DRResultStore()
+    drs.deathroll_mc([3, 20], 100, store=store, max_len=4)
+    with pytest.raises(DRStoreValueError):
+        drs.deathroll_mc([3, 20], 200, store=store, max_len=6)
+    assert store.games(3) == store.games(20) == 100
+    assert store.histogram(20, 4)[0].sum() == 100
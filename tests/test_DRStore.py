@@ -0,0 +1,109 @@
+"""Tests for DRStore.py and the store mode of DRSimulate.deathroll_mc."""
+
+import random
+
+import numpy as np
+import pytest
+
+import DRSimulate as drs
+from DRStore import DRResultStore, DRStoreFileError, DRStoreValueError
+
+
+def test_add_pools_sums_and_estimates():
+    store = DRResultStore()
+    store.add(10, 4, 2, 12, 40, streams=[1])
+    store.add(10, 6, 3, 18, 60, streams=[2])
+    assert store.games(10) == 10
+    assert store.games(11) == 0
+    np.testing.assert_allclose(store.estimate(10), [[0.5, 3.0]])
+    # (10 * 100 - 30 ** 2) / (10 * 9)
+    assert store.rolls_var(10) == pytest.approx(100 / 90)
+
+
+def test_add_rejects_bad_counts():
+    store = DRResultStore()
+    with pytest.raises(DRStoreValueError):
+        store.add(0, 1, 0, 1, 1)
+    with pytest.raises(DRStoreValueError):
+        store.add(5, 1, 2, 1, 1)
+    with pytest.raises(DRStoreValueError):
+        store.games(5.7)
+    with pytest.raises(DRStoreValueError):
+        store.estimate(5)
+
+
+def test_merge_refuses_the_same_stream_twice():
+    first = DRResultStore()
+    first.add(3, 10, 4, 20, 50, streams=[7])
+    second = DRResultStore()
+    second.add(3, 5, 2, 10, 25, streams=[8])
+    second.add(4, 5, 2, 10, 25, streams=[9])
+    first.merge(second)
+    assert first.games(3) == 15
+    assert first.games(4) == 5
+    with pytest.raises(DRStoreValueError):
+        first.merge(second)
+    assert first.games(3) == 15
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "store.txt"
+    store = DRResultStore(path)
+    store.add(2, 3, 1, 6, 14, streams=[2 ** 64 - 1])
+    store.add(9, 4, 2, 10, 30)
+    store.save()
+    loaded = DRResultStore(path)
+    assert [entry[:5] for n, entry in loaded.entries()] == [
+        [3, 1, 6, 14, [2 ** 64 - 1]], [4, 2, 10, 30, []]]
+
+
+def test_missing_file_is_an_empty_store(tmp_path):
+    assert DRResultStore(tmp_path / "missing.txt").entries() == []
+
+
+def test_deathroll_mc_only_simulates_the_shortfall():
+    store = DRResultStore()
+    first = drs.deathroll_mc([2, 6], 200, store=store)
+    assert [store.games(n) for n in (2, 6)] == [200, 200]
+    # nothing is simulated when the store already covers the request
+    np.testing.assert_array_equal(
+        drs.deathroll_mc([2, 6], 150, store=store), first)
+    drs.deathroll_mc([2, 6], 500, store=store)
+    entries = dict(store.entries())
+    assert entries[2][0] == 500
+    assert len(entries[2][4]) == 2  # one stream per run that simulated
+
+
+def test_deathroll_mc_leaves_the_global_random_state_alone():
+    random.seed(42)
+    expected = random.random()
+    random.seed(42)
+    drs.deathroll_mc(20, 100, store=DRResultStore())
+    assert random.random() == expected
+
+
+def test_repeated_streams_are_reported():
+    store = DRResultStore()
+    with pytest.raises(DRStoreValueError, match=r"\[4\] for n=3 are given"):
+        store.add(3, 2, 1, 4, 8, streams=[4, 4])
+    store.add(3, 2, 1, 4, 8, streams=[4])
+    with pytest.raises(DRStoreValueError, match=r"\[4\] for n=3 were"):
+        store.add(3, 2, 1, 4, 8, streams=[4, 5])
+
+
+def test_interrupted_save_keeps_the_previous_file(tmp_path, monkeypatch):
+    path = tmp_path / "store.txt"
+    store = DRResultStore(path)
+    store.add(2, 3, 1, 6, 14, streams=[1])
+    store.save()
+    saved = path.read_text()
+    store.add(5, 3, 1, 6, 14, streams=[2])
+
+    def fail(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("os.fsync", fail)
+    with pytest.raises(DRStoreFileError):
+        store.save()
+    assert path.read_text() == saved
+    assert [p.name for p in tmp_path.iterdir()] == ["store.txt"]
@@ -0,0 +1,43 @@
+"""Tests for DeathrollCalc.py."""
+
+import numpy as np
+import pytest
+
+import DeathrollCalc as drc
+
+
+def test_small_values():
+    assert drc.p1_winrate(1) == 0
+    assert drc.p1_winrate(2) == pytest.approx(1 / 3)
+    assert drc.p1_winrate(3) == pytest.approx(5 / 12)
+    assert drc.avg_rolls(1) == 0
+    assert drc.avg_rolls(2) == pytest.approx(2)
+    assert drc.avg_rolls(3) == pytest.approx(2.5)
+
+
+def test_iterable_matches_scalar_in_the_given_order():
+    n = [7, 3, 500, 3]
+    np.testing.assert_array_equal(drc.p1_winrate(n),
+                                  [drc.p1_winrate(i) for i in n])
+    np.testing.assert_array_equal(drc.p2_winrate(n), 1 - drc.p1_winrate(n))
+    np.testing.assert_array_equal(drc.avg_rolls(n),
+                                  [drc.avg_rolls(i) for i in n])
+    assert drc.p1_winrate([]).shape == (0,)
+
+
+def test_large_table_follows_the_recurrences():
+    n = np.arange(1, 200_001)
+    p_l1 = 1 - drc.p1_winrate(n)
+    r = drc.avg_rolls(n)
+    # P_w1(1) and R(1) are 0, so the sums may start from 1 instead of 2
+    sig_p_w1 = np.cumsum(1 - p_l1)
+    sig_r = np.cumsum(r)
+    np.testing.assert_allclose(p_l1[1:], (2 + sig_p_w1[:-1]) / (n[1:] + 1))
+    np.testing.assert_allclose(r[1:], (n[1:] + sig_r[:-1]) / (n[1:] - 1))
+
+
+def test_bad_arguments_are_rejected():
+    with pytest.raises(drc.DeathrollCalcValueError):
+        drc.p1_winrate(0)
+    with pytest.raises(drc.DeathrollCalcValueError):
+        drc.avg_rolls([3, "x"])